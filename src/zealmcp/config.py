@@ -8,6 +8,14 @@ from dataclasses import dataclass
 class Settings:
     docsets_paths: tuple[str, ...]
     max_chars: int = 20_000
+    cache_dir: str | None = None
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME", "").strip()
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "zealmcp")
 
 
 def load_settings() -> Settings:
@@ -25,4 +33,4 @@ def load_settings() -> Settings:
             "Provide one or more directories containing *.docset folders."
         )
 
-    return Settings(docsets_paths=tuple(parts))
+    return Settings(docsets_paths=tuple(parts), cache_dir=default_cache_dir())
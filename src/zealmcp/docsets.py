@@ -1,10 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+import codecs
+import functools
+import heapq
+import itertools
+import json
+import mmap
+import os
 import plistlib
+import re
 import sqlite3
-from collections.abc import Iterable
-from dataclasses import dataclass
+import tempfile
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from pathlib import Path
+from typing import Any
+
+import lxml.etree
 
 
 @dataclass(frozen=True)
@@ -14,62 +28,223 @@ class Docset:
     root: Path
     dsidx_path: Path
     documents_path: Path
+    # documents_path.resolve(), computed once at discovery.
+    documents_root_resolved: Path
+    # "zeal://docset/{id}/doc/"; append an entry path to get its source_uri.
+    source_uri_prefix: str
+    # Full-text shadow index in the cache dir; None means search the dsidx directly.
+    fts_path: Path | None = None
+
+
+# \w is Unicode-aware, matching the str.isalnum() test this replaced (plus "_").
+_ID_BAD = re.compile(r"[^\w.-]+")
+_ID_DASHES = re.compile(r"-{2,}")
 
 
 def _safe_docset_id(name: str) -> str:
-    normalized = "".join(
-        ch if ch.isalnum() or ch in ("-", "_", ".") else "-" for ch in name.strip()
-    )
-    normalized = "-".join(filter(None, normalized.split("-")))
+    normalized = _ID_BAD.sub("-", name.strip())
+    normalized = _ID_DASHES.sub("-", normalized).strip("-")
     return normalized.lower() or "docset"
 
 
-def discover_docsets(docsets_dirs: Iterable[str]) -> list[Docset]:
+def _source_uri_prefix(docset_id: str) -> str:
+    return f"zeal://docset/{docset_id}/doc/"
+
+
+_MANIFEST_VERSION = 1
+
+
+def _load_manifest(path: str) -> dict[str, Any]:
+    try:
+        with open(path, "rb") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("version") != _MANIFEST_VERSION:
+        return {}
+    bases = manifest.get("bases")
+    return bases if isinstance(bases, dict) else {}
+
+
+def _write_manifest(path: str, bases: dict[str, Any]) -> None:
+    # Best effort: a missing or stale manifest only costs a rescan.
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": _MANIFEST_VERSION, "bases": bases}, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        pass
+
+
+def _mtime_ns(path: str | Path) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+# Info.plist keys that name a docset, in order of preference (Dash-style first).
+_NAME_KEYS = ("CFBundleDisplayName", "CFBundleName", "DocSetPlatformFamily")
+
+
+def _pick_name(values: dict[str, Any]) -> str | None:
+    for key in _NAME_KEYS:
+        if values.get(key):
+            return str(values[key])
+    return None
+
+
+def _read_dash_name(path: str) -> str | None:
+    """Return the docset name from an Info.plist, or None if it has none.
+
+    XML plists are scanned with iterparse, stopping once all name keys are
+    seen. Binary or unparseable plists fall back to plistlib.
+    """
+    try:
+        with open(path, "rb") as f:
+            if not f.read(8).startswith(b"bplist"):
+                f.seek(0)
+                values: dict[str, Any] = {}
+                key: str | None = None
+                for _, elem in lxml.etree.iterparse(f, events=("end",), recover=True):
+                    # Only direct children of the top-level <dict> are of interest.
+                    parent = elem.getparent()
+                    if parent is None or parent.getparent() is None:
+                        continue
+                    if parent.tag != "dict" or parent.getparent().tag != "plist":
+                        continue
+                    if elem.tag == "key":
+                        key = elem.text
+                        continue
+                    if key in _NAME_KEYS:
+                        values[key] = elem.text
+                        if len(values) == len(_NAME_KEYS):
+                            break
+                    key = None
+                return _pick_name(values)
+    except OSError:
+        return None
+    except lxml.etree.LxmlError:
+        pass
+
+    try:
+        with open(path, "rb") as f:
+            return _pick_name(plistlib.load(f))
+    except Exception:
+        return None
+
+
+def _scan_base(
+    base_path: str, previous: dict[str, dict[str, Any]]
+) -> list[tuple[dict[str, Any], dict[str, Any] | None]]:
+    """List docset candidates in ``base_path``, paired with their cached entries."""
+    with os.scandir(base_path) as it:
+        roots = sorted(
+            entry.path
+            for entry in it
+            if entry.name.endswith(".docset") and entry.is_dir()
+        )
+
+    candidates: list[tuple[dict[str, Any], dict[str, Any] | None]] = []
+    for root in roots:
+        # One listing of Resources instead of a stat per expected child.
+        resources = os.path.join(root, "Contents", "Resources")
+        try:
+            with os.scandir(resources) as it:
+                names = {entry.name for entry in it}
+        except OSError:
+            continue
+        if "docSet.dsidx" not in names or "Documents" not in names:
+            continue
+
+        entry = {
+            "root": root,
+            "dsidx": os.path.join(resources, "docSet.dsidx"),
+            "documents": os.path.join(resources, "Documents"),
+        }
+        candidates.append((entry, previous.get(root)))
+    return candidates
+
+
+def _stem(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _refresh_entry(
+    entry: dict[str, Any], cached: dict[str, Any] | None
+) -> dict[str, Any]:
+    info_plist = os.path.join(entry["root"], "Contents", "Info.plist")
+    plist_mtime = _mtime_ns(info_plist)
+    if cached is not None and cached.get("plist_mtime_ns") == plist_mtime:
+        name = cached["name"]
+    elif plist_mtime is not None:
+        name = _read_dash_name(info_plist) or _stem(entry["root"])
+    else:
+        name = _stem(entry["root"])
+    return {**entry, "id": _safe_docset_id(name), "name": name, "plist_mtime_ns": plist_mtime}
+
+
+def _refresh_entries(
+    candidates: list[tuple[dict[str, Any], dict[str, Any] | None]],
+) -> list[dict[str, Any]]:
+    if len(candidates) <= 1:
+        return [_refresh_entry(e, cached) for e, cached in candidates]
+
+    # Stat and parse Info.plists concurrently; this is mostly waiting on I/O.
+    workers = min(8, (os.cpu_count() or 1) * 2, len(candidates))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda c: _refresh_entry(*c), candidates))
+
+
+def discover_docsets(
+    docsets_dirs: Iterable[str], cache_dir: str | None = None
+) -> list[Docset]:
+    """Find docsets under ``docsets_dirs``.
+
+    When ``cache_dir`` is given, docset names read from Info.plist are kept in a
+    manifest there and reused while the plist's mtime is unchanged, and
+    up-to-date FTS indexes found there are attached. Missing indexes are not
+    built here.
+    """
+    manifest_path = os.path.join(cache_dir, "docsets.json") if cache_dir else None
+    manifest = _load_manifest(manifest_path) if manifest_path else {}
+    new_manifest: dict[str, Any] = {}
     docsets: list[Docset] = []
 
     for base in docsets_dirs:
-        base_path = Path(base).expanduser()
-        if not base_path.exists() or not base_path.is_dir():
+        base_path = os.path.expanduser(base)
+        if not os.path.isdir(base_path):
             continue
 
-        for docset_root in sorted(base_path.glob("*.docset")):
-            if not docset_root.is_dir():
-                continue
+        # Always rescan: a docset can be filled in (or emptied) without the base
+        # directory's mtime changing. Only the Info.plist parse is cached.
+        cached_base = manifest.get(base_path) or {}
+        previous = {e["root"]: e for e in cached_base.get("docsets", [])}
+        entries = _refresh_entries(_scan_base(base_path, previous))
+        new_manifest[base_path] = {"docsets": entries}
 
-            contents = docset_root / "Contents"
-            resources = contents / "Resources"
-            dsidx = resources / "docSet.dsidx"
-            documents = resources / "Documents"
-            if not dsidx.exists() or not documents.exists():
-                continue
-
-            name = docset_root.stem
-            info_plist = contents / "Info.plist"
-            if info_plist.exists():
-                try:
-                    with info_plist.open("rb") as f:
-                        info = plistlib.load(f)
-                    # Prefer Dash-style keys when available.
-                    name = (
-                        info.get("CFBundleDisplayName")
-                        or info.get("CFBundleName")
-                        or info.get("DocSetPlatformFamily")
-                        or name
-                    )
-                except Exception:
-                    pass
-
-            docset_id = _safe_docset_id(name)
+        for e in entries:
             docsets.append(
                 Docset(
-                    id=docset_id,
-                    name=str(name),
-                    root=docset_root,
-                    dsidx_path=dsidx,
-                    documents_path=documents,
+                    id=e["id"],
+                    name=e["name"],
+                    root=Path(e["root"]),
+                    dsidx_path=Path(e["dsidx"]),
+                    documents_path=Path(e["documents"]),
+                    documents_root_resolved=Path(os.path.realpath(e["documents"])),
+                    source_uri_prefix=_source_uri_prefix(e["id"]),
                 )
             )
 
+    if manifest_path and new_manifest != manifest:
+        _write_manifest(manifest_path, new_manifest)
+
     # Ensure stable ordering and uniqueness by id.
     unique: dict[str, Docset] = {}
     for d in docsets:
@@ -77,10 +252,17 @@ def discover_docsets(docsets_dirs: Iterable[str]) -> list[Docset]:
             # De-duplicate by including parent directory name.
             suffix = _safe_docset_id(d.root.parent.name)
             alt_id = f"{d.id}-{suffix}"
-            unique.setdefault(alt_id, Docset(**{**d.__dict__, "id": alt_id}))
+            unique.setdefault(
+                alt_id, replace(d, id=alt_id, source_uri_prefix=_source_uri_prefix(alt_id))
+            )
         else:
             unique[d.id] = d
 
+    if cache_dir:
+        # Only pick up indexes that are already built; see ensure_fts_indexes().
+        for docset_id, d in unique.items():
+            unique[docset_id] = replace(d, fts_path=_current_fts_index(d, cache_dir))
+
     return sorted(unique.values(), key=lambda d: d.name.lower())
 
 
@@ -100,9 +282,20 @@ def _connect_readonly(db_path: Path) -> sqlite3.Connection:
     return sqlite3.connect(uri, uri=True)
 
 
-def _get_search_table(conn: sqlite3.Connection) -> str:
+@functools.cache
+def _conn_for(db_path: str) -> sqlite3.Connection:
+    # One long-lived read-only connection per index, shared across searches.
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+
+
+@functools.cache
+def _search_table_for(db_path: str) -> str:
+    return _get_search_table(_conn_for(db_path))
+
+
+def _get_search_table(conn: sqlite3.Connection, schema: str = "main") -> str:
     # Most docsets use 'searchIndex'. Some use 'searchIndex' with different casing.
-    cur = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    cur = conn.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type='table'")
     tables = {row[0] for row in cur.fetchall()}
     if "searchIndex" in tables:
         return "searchIndex"
@@ -112,56 +305,425 @@ def _get_search_table(conn: sqlite3.Connection) -> str:
     raise RuntimeError("Docset index missing searchIndex table")
 
 
-def search_docset(docset: Docset, query: str, limit: int) -> list[SearchResult]:
+def _fts_index_source_mtime(index_path: Path) -> int | None:
+    try:
+        conn = _connect_readonly(index_path)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'source_mtime_ns'").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def _build_fts_index(dsidx_path: Path, index_path: Path, source_mtime: int) -> None:
+    os.makedirs(index_path.parent, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=index_path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(f"file:{Path(tmp).as_posix()}", uri=True)
+        try:
+            conn.execute(
+                "ATTACH DATABASE ? AS src", (f"file:{dsidx_path.as_posix()}?mode=ro",)
+            )
+            table = _get_search_table(conn, "src")
+            # The trigram tokenizer keeps substring matching ('Focus' finds 'setFocus').
+            conn.execute(
+                "CREATE VIRTUAL TABLE names USING fts5("
+                "name, type UNINDEXED, path UNINDEXED, tokenize='trigram')"
+            )
+            conn.execute(f"INSERT INTO names SELECT name, type, path FROM src.{table}")
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value)")
+            conn.execute("INSERT INTO meta VALUES ('source_mtime_ns', ?)", (source_mtime,))
+            conn.commit()
+            conn.execute("DETACH DATABASE src")
+        finally:
+            conn.close()
+        os.replace(tmp, index_path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _fts_index_path(docset: Docset, cache_dir: str) -> Path:
+    return Path(cache_dir) / f"{docset.id}.fts.sqlite"
+
+
+def _current_fts_index(docset: Docset, cache_dir: str) -> Path | None:
+    """Return ``docset``'s FTS5 index if it is already built and up to date."""
+    source_mtime = _mtime_ns(docset.dsidx_path)
+    index_path = _fts_index_path(docset, cache_dir)
+    if (
+        source_mtime is not None
+        and index_path.exists()
+        and _fts_index_source_mtime(index_path) == source_mtime
+    ):
+        return index_path
+    return None
+
+
+def _ensure_fts_index(docset: Docset, cache_dir: str) -> Path | None:
+    """Return an up-to-date FTS5 index for ``docset``, building it if needed.
+
+    The index lives in ``cache_dir`` so the docset itself is never written to.
+    Returns None if the index cannot be built (e.g. SQLite lacks FTS5).
+    """
+    index_path = _current_fts_index(docset, cache_dir)
+    if index_path is not None:
+        return index_path
+
+    source_mtime = _mtime_ns(docset.dsidx_path)
+    if source_mtime is None:
+        return None
+    index_path = _fts_index_path(docset, cache_dir)
+    try:
+        _build_fts_index(docset.dsidx_path, index_path, source_mtime)
+    except (OSError, sqlite3.Error, RuntimeError):
+        return None
+    return index_path
+
+
+def ensure_fts_indexes(docsets: Iterable[Docset], cache_dir: str) -> list[Docset]:
+    """Build missing or stale FTS5 indexes for ``docsets`` in ``cache_dir``.
+
+    Returns the docsets with ``fts_path`` set wherever an index is available.
+    Docsets without one are still searchable through their own dsidx.
+    """
+    docsets = list(docsets)
+    if len(docsets) <= 1:
+        paths = [_ensure_fts_index(d, cache_dir) for d in docsets]
+    else:
+        # SQLite releases the GIL while building, so builds run in parallel.
+        workers = min(8, os.cpu_count() or 1, len(docsets))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            paths = list(executor.map(lambda d: _ensure_fts_index(d, cache_dir), docsets))
+    return [replace(d, fts_path=p) for d, p in zip(docsets, paths, strict=True)]
+
+
+# Exact matches first, then prefix matches, then other substring matches.
+_RANK_SQL = "(CASE WHEN name = :q COLLATE NOCASE THEN 0 WHEN name LIKE :qp THEN 1 ELSE 2 END)"
+
+
+def _search_params(q: str, limit: int) -> dict[str, str | int]:
+    return {"q": q, "qp": f"{q}%", "qany": f"%{q}%", "lim": limit}
+
+
+def _open_search(docset: Docset) -> tuple[sqlite3.Connection, str, sqlite3.Connection | None]:
+    # Cached dsidx connection, its searchIndex table, and the FTS index connection if any.
+    dsidx = docset.dsidx_path.as_posix()
+    fts_conn = _conn_for(docset.fts_path.as_posix()) if docset.fts_path is not None else None
+    return _conn_for(dsidx), _search_table_for(dsidx), fts_conn
+
+
+def _search_rows(
+    conn: sqlite3.Connection,
+    table: str,
+    fts_conn: sqlite3.Connection | None,
+    q: str,
+    limit: int,
+) -> list[tuple[str, str, str]]:
+    params: dict[str, str | int] = _search_params(q, limit)
+    if fts_conn is not None and len(q) >= 3:
+        # MATCH only filters; quoted so the query is one substring phrase, not FTS syntax.
+        params["phrase"] = '"' + q.replace('"', '""') + '"'
+        conn, source, where = fts_conn, "names", "names MATCH :phrase"
+    else:
+        # Trigrams cannot serve shorter queries, and scanning the plain dsidx
+        # is cheaper than scanning the FTS table.
+        source, where = table, "name LIKE :qany"
+    cur = conn.execute(
+        f"SELECT name, type, path FROM {source} WHERE {where} "
+        f"ORDER BY {_RANK_SQL}, length(name) LIMIT :lim",
+        params,
+    )
+    return cur.fetchall()
+
+
+def _build_result(
+    docset_id: str,
+    docset_name: str,
+    prefix: str,
+    name: str,
+    typ: str | None,
+    path: str,
+    as_dicts: bool,
+) -> SearchResult | dict[str, Any]:
+    # ``prefix`` is the docset's source_uri prefix.
+    if as_dicts:
+        return {
+            "docset_id": docset_id,
+            "docset_name": docset_name,
+            "title": name,
+            "entry_type": typ,
+            "path": path,
+            "source_uri": prefix + path,
+        }
+    return SearchResult(
+        docset_id=docset_id,
+        docset_name=docset_name,
+        title=name,
+        entry_type=typ,
+        path=path,
+        source_uri=prefix + path,
+    )
+
+
+def _search_one(
+    conn: sqlite3.Connection,
+    table: str,
+    fts_conn: sqlite3.Connection | None,
+    docset_id: str,
+    docset_name: str,
+    prefix: str,
+    query: str,
+    limit: int,
+    as_dicts: bool,
+) -> list[SearchResult] | list[dict[str, Any]]:
+    # Shared by search_docset and search_by_index; ``prefix`` is the source_uri prefix.
     q = query.strip()
     if not q:
         return []
 
-    conn = _connect_readonly(docset.dsidx_path)
-    try:
-        table = _get_search_table(conn)
-        # Fetch more than limit; rank in Python for nicer results.
-        fetch_n = max(limit * 5, limit)
-        like_any = f"%{q}%"
-        cur = conn.execute(
-            f"SELECT name, type, path FROM {table} WHERE name LIKE ? LIMIT ?",
-            (like_any, fetch_n),
+    return [
+        _build_result(docset_id, docset_name, prefix, name, typ, path, as_dicts)
+        for name, typ, path in _search_rows(conn, table, fts_conn, q, limit)
+    ]
+
+
+def search_docset(
+    docset: Docset, query: str, limit: int, as_dicts: bool = False
+) -> list[SearchResult] | list[dict[str, Any]]:
+    """Search one docset. ``as_dicts`` returns plain dicts shaped like ``SearchResult``."""
+    if not query.strip():
+        return []
+
+    conn, table, fts_conn = _open_search(docset)
+    return _search_one(
+        conn,
+        table,
+        fts_conn,
+        docset.id,
+        docset.name,
+        docset.source_uri_prefix,
+        query,
+        limit,
+        as_dicts,
+    )
+
+
+@dataclass
+class DocsetTable:
+    """Per-docset search state as parallel lists, indexed by position.
+
+    Built once at startup so searches read ready-made strings and connections
+    instead of re-deriving them from ``Docset`` paths on every call.
+    """
+
+    ids: list[str] = field(default_factory=list)
+    names: list[str] = field(default_factory=list)
+    uri_prefixes: list[str] = field(default_factory=list)
+    conns: list[sqlite3.Connection | None] = field(default_factory=list)
+    tables: list[str | None] = field(default_factory=list)
+    fts_conns: list[sqlite3.Connection | None] = field(default_factory=list)
+    id_to_index: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, docsets: Iterable[Docset]) -> DocsetTable:
+        table = cls()
+        for i, docset in enumerate(docsets):
+            try:
+                conn, search_table, fts_conn = _open_search(docset)
+            except (sqlite3.Error, RuntimeError):
+                # Reported when the docset is searched.
+                conn, search_table, fts_conn = None, None, None
+            table.ids.append(docset.id)
+            table.names.append(docset.name)
+            table.uri_prefixes.append(docset.source_uri_prefix)
+            table.conns.append(conn)
+            table.tables.append(search_table)
+            table.fts_conns.append(fts_conn)
+            table.id_to_index[docset.id] = i
+        return table
+
+
+def search_by_index(
+    table: DocsetTable, i: int, query: str, limit: int, as_dicts: bool = False
+) -> list[SearchResult] | list[dict[str, Any]]:
+    if not query.strip():
+        return []
+
+    conn = table.conns[i]
+    search_table = table.tables[i]
+    if conn is None or search_table is None:
+        raise RuntimeError(f"Docset index unavailable: {table.ids[i]}")
+    return _search_one(
+        conn,
+        search_table,
+        table.fts_conns[i],
+        table.ids[i],
+        table.names[i],
+        table.uri_prefixes[i],
+        query,
+        limit,
+        as_dicts,
+    )
+
+
+# (src alias, name, type, path, rank) as selected by SearchRouter batches.
+_RouterRow = tuple[str, str, str | None, str, int]
+
+
+def _fetch(conn: sqlite3.Connection, sql: str, params: dict[str, Any]) -> list[Any]:
+    return conn.execute(sql, params).fetchall()
+
+
+class SearchRouter:
+    """Searches many docsets at once with a single UNION ALL query.
+
+    Each docset's index is ATTACHed to an in-memory connection so SQLite ranks
+    and truncates the combined hits. SQLite caps the number of attached
+    databases per connection, so docsets are spread over as many connections
+    as needed and their results merged.
+    """
+
+    def __init__(self, docsets: Iterable[Docset]) -> None:
+        self._by_alias: dict[str, Docset] = {}
+        # (connection, SQL for queries of 3+ chars, SQL for shorter queries)
+        self._batches: list[tuple[sqlite3.Connection, str, str]] = []
+
+        conn: sqlite3.Connection | None = None
+        attached = 0
+        long_selects: list[str] = []
+        short_selects: list[str] = []
+        for i, docset in enumerate(docsets):
+            needed = 2 if docset.fts_path is not None else 1
+            if conn is not None and attached + needed > conn.getlimit(
+                sqlite3.SQLITE_LIMIT_ATTACHED
+            ):
+                self._batches.append(self._batch(conn, long_selects, short_selects))
+                conn, attached, long_selects, short_selects = None, 0, [], []
+            if conn is None:
+                conn = sqlite3.connect(":memory:", uri=True, check_same_thread=False)
+            alias = f"d{i}"
+            try:
+                long_select, short_select = self._attach(conn, alias, docset)
+            except (sqlite3.Error, RuntimeError):
+                # Some docsets may not have a searchIndex table.
+                continue
+            self._by_alias[alias] = docset
+            attached += needed
+            long_selects.append(long_select)
+            short_selects.append(short_select)
+        if conn is not None and long_selects:
+            self._batches.append(self._batch(conn, long_selects, short_selects))
+
+    @staticmethod
+    def _attach(conn: sqlite3.Connection, alias: str, docset: Docset) -> tuple[str, str]:
+        """Attach ``docset`` and return its (3+ char, shorter) query SELECTs."""
+        conn.execute(
+            f"ATTACH DATABASE ? AS {alias}", (f"file:{docset.dsidx_path.as_posix()}?mode=ro",)
+        )
+        try:
+            table = _get_search_table(conn, alias)
+        except (sqlite3.Error, RuntimeError):
+            conn.execute(f"DETACH DATABASE {alias}")
+            raise
+        short_select = (
+            f"SELECT '{alias}' AS src, name, type, path FROM {alias}.{table} "
+            "WHERE name LIKE :qany"
         )
-        rows = cur.fetchall()
-    finally:
-        conn.close()
-
-    def score(name: str) -> tuple[int, int]:
-        n = name.lower()
-        qq = q.lower()
-        if n == qq:
-            return (0, len(n))
-        if n.startswith(qq):
-            return (1, len(n))
-        idx = n.find(qq)
-        if idx >= 0:
-            return (2, idx)
-        return (3, len(n))
-
-    ranked = sorted(rows, key=lambda r: score(r[0]))[:limit]
-
-    out: list[SearchResult] = []
-    for name, typ, path in ranked:
-        source_uri = f"zeal://docset/{docset.id}/doc/{path}"
-        out.append(
-            SearchResult(
-                docset_id=docset.id,
-                docset_name=docset.name,
-                title=name,
-                entry_type=typ,
-                path=path,
-                source_uri=source_uri,
+        if docset.fts_path is None:
+            return short_select, short_select
+
+        # The FTS index answers LIKE '%q%' from its trigrams, but only for 3+ chars;
+        # shorter queries scan the dsidx, which is cheaper than scanning the FTS table.
+        fts_alias = f"f{alias}"
+        try:
+            conn.execute(
+                f"ATTACH DATABASE ? AS {fts_alias}",
+                (f"file:{docset.fts_path.as_posix()}?mode=ro",),
             )
+        except sqlite3.Error:
+            return short_select, short_select
+        long_select = (
+            f"SELECT '{alias}' AS src, name, type, path FROM {fts_alias}.names "
+            "WHERE name LIKE :qany"
+        )
+        return long_select, short_select
+
+    @staticmethod
+    def _batch(
+        conn: sqlite3.Connection, long_selects: list[str], short_selects: list[str]
+    ) -> tuple[sqlite3.Connection, str, str]:
+        return conn, SearchRouter._batch_sql(long_selects), SearchRouter._batch_sql(short_selects)
+
+    @staticmethod
+    def _batch_sql(selects: list[str]) -> str:
+        return (
+            f"SELECT src, name, type, path, {_RANK_SQL} AS rk "
+            f"FROM ({' UNION ALL '.join(selects)}) ORDER BY rk, length(name) LIMIT :lim"
         )
-    return out
 
+    def search(
+        self, query: str, limit: int, as_dicts: bool = False
+    ) -> list[SearchResult] | list[dict[str, Any]]:
+        q = query.strip()
+        if not q:
+            return []
+
+        params = _search_params(q, limit)
+        per_batch: list[list[_RouterRow]] = []
+        for conn, long_sql, short_sql in self._batches:
+            sql = long_sql if len(q) >= 3 else short_sql
+            try:
+                per_batch.append(_fetch(conn, sql, params))
+            except Exception:
+                continue
+        return self._merge(per_batch, limit, as_dicts)
+
+    async def asearch(
+        self, query: str, limit: int, as_dicts: bool = False
+    ) -> list[SearchResult] | list[dict[str, Any]]:
+        """Like ``search``, but queries each batch concurrently in worker threads.
+
+        sqlite3 releases the GIL while a statement runs, so batches overlap.
+        """
+        q = query.strip()
+        if not q:
+            return []
+
+        params = _search_params(q, limit)
+        outcomes = await asyncio.gather(
+            *(
+                asyncio.to_thread(_fetch, conn, long_sql if len(q) >= 3 else short_sql, params)
+                for conn, long_sql, short_sql in self._batches
+            ),
+            return_exceptions=True,
+        )
+        per_batch = [rows for rows in outcomes if not isinstance(rows, BaseException)]
+        return self._merge(per_batch, limit, as_dicts)
+
+    def _merge(
+        self, per_batch: list[list[_RouterRow]], limit: int, as_dicts: bool
+    ) -> list[SearchResult] | list[dict[str, Any]]:
+        if len(per_batch) == 1:
+            rows = per_batch[0]
+        else:
+            # Each batch is already ranked; keep the global top-K.
+            rows = heapq.nsmallest(
+                limit, itertools.chain.from_iterable(per_batch), key=lambda r: (r[4], len(r[1]))
+            )
+        out = []
+        for src, name, typ, path, _ in rows:
+            d = self._by_alias[src]
+            out.append(
+                _build_result(d.id, d.name, d.source_uri_prefix, name, typ, path, as_dicts)
+            )
+        return out
 
-def load_entry_html(docset: Docset, path: str) -> tuple[str, Path]:
+
+def resolve_entry_path(docset: Docset, path: str) -> Path:
     # Dash stores relative paths within Documents.
     rel = path.lstrip("/")
     # Some docsets include anchors/query params in the index path.
@@ -170,17 +732,63 @@ def load_entry_html(docset: Docset, path: str) -> tuple[str, Path]:
     full = (docset.documents_path / rel).resolve()
 
     # Prevent escaping the Documents directory.
-    docs_root = docset.documents_path.resolve()
-    if docs_root not in full.parents and full != docs_root:
+    docs_root = str(docset.documents_root_resolved)
+    try:
+        inside = os.path.commonpath([docs_root, str(full)]) == docs_root
+    except ValueError:
+        inside = False
+    if not inside:
         raise RuntimeError("Invalid entry path")
 
     if not full.exists() or not full.is_file():
         raise FileNotFoundError(rel)
 
-    return full.read_text(encoding="utf-8", errors="replace"), full
-
-
-def truncate_text(text: str, max_chars: int) -> str:
-    if max_chars <= 0 or len(text) <= max_chars:
+    return full
+
+
+def read_entry_html(full: Path, byte_limit: int | None = None) -> str:
+    """Read HTML from a resolved entry path, optionally only its first ``byte_limit`` bytes.
+
+    Truncation is best effort: the prefix may end mid-tag or mid-character,
+    which the lenient HTML parser and ``errors="replace"`` tolerate.
+    """
+    with full.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap rejects empty files.
+            return ""
+        # Decode straight from the mapping to skip an intermediate bytes copy.
+        with (
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+            memoryview(mm) as view,
+        ):
+            return str(view[:byte_limit], "utf-8", "replace")
+
+
+def iter_entry_html(full: Path, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """Yield a resolved entry's HTML decoded in chunks of about ``chunk_size`` bytes.
+
+    Lets callers stop reading once they have what they need.
+    """
+    with full.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap rejects empty files.
+            return
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start in range(0, len(mm), chunk_size):
+                yield decoder.decode(mm[start : start + chunk_size])
+            yield decoder.decode(b"", final=True)
+
+
+def load_entry_html(
+    docset: Docset, path: str, byte_limit: int | None = None
+) -> tuple[str, Path]:
+    full = resolve_entry_path(docset, path)
+    return read_entry_html(full, byte_limit), full
+
+
+def truncate_text(text: str, max_chars: int, truncated: bool = False) -> str:
+    # ``truncated`` marks text whose source was already cut short.
+    if not truncated and (max_chars <= 0 or len(text) <= max_chars):
         return text
     return text[:max_chars].rstrip() + "\n\n[TRUNCATED]"
@@ -1,25 +1,98 @@
 from __future__ import annotations
 
-from bs4 import BeautifulSoup
+import re
+from collections.abc import Iterable
 
+import lxml.etree
 
-def html_to_text(html: str) -> str:
-    soup = BeautifulSoup(html, "lxml")
-
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
-
-    text = soup.get_text("\n")
-    lines = [line.strip() for line in text.splitlines()]
-    compact: list[str] = []
-    last_blank = False
-    for line in lines:
-        if not line:
-            if not last_blank and compact:
-                compact.append("")
-            last_blank = True
+_CHUNK_SIZE = 64 * 1024
+
+# Whitespace cleanup, applied to the whole extracted text at once.
+_LEADING_WS = re.compile(r"(?m)^[^\S\n]+")
+_WS_LINE = re.compile(r"[^\S\n]+(\n|$)")
+_MANY_BLANKS = re.compile(r"\n{3,}")
+
+_SKIP_TAGS = frozenset({"script", "style", "noscript"})
+
+# Tags whose boundaries should become line breaks in the extracted text.
+_BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "body", "br", "caption", "dd", "details",
+    "div", "dl", "dt", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4",
+    "h5", "h6", "head", "header", "hr", "html", "li", "main", "nav", "ol", "p", "pre",
+    "section", "summary", "table", "tbody", "td", "tfoot", "th", "thead", "title", "tr",
+    "ul",
+})
+
+
+class _TextTarget:
+    """lxml parser target that collects text without building a tree."""
+
+    def __init__(self) -> None:
+        self.parts: list[str] = []
+        self.skip_depth = 0
+        # Characters of text collected so far, before whitespace cleanup.
+        self.size = 0
+
+    def start(self, tag: str, attrs: dict[str, str]) -> None:
+        if tag in _SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def end(self, tag: str) -> None:
+        if tag in _SKIP_TAGS:
+            if self.skip_depth:
+                self.skip_depth -= 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def data(self, text: str) -> None:
+        if not self.skip_depth:
+            self.parts.append(text)
+            self.size += len(text)
+
+    def close(self) -> str:
+        return "".join(self.parts)
+
+
+def _clean(text: str) -> str:
+    text = _LEADING_WS.sub("", text)
+    text = _WS_LINE.sub(r"\1", text)
+    text = _MANY_BLANKS.sub("\n\n", text)
+    return text.strip()
+
+
+def html_chunks_to_text(chunks: Iterable[str], max_chars: int = 0) -> tuple[str, bool]:
+    """Extract text from HTML supplied as consecutive chunks.
+
+    With ``max_chars > 0``, stops consuming ``chunks`` once more than that much
+    text has been extracted. Returns the text and whether it stopped early.
+    """
+    target = _TextTarget()
+    parser = lxml.etree.HTMLParser(target=target)
+    fed = stopped = False
+    next_check = max_chars
+    for chunk in chunks:
+        if not fed and not chunk.strip():
             continue
-        compact.append(line)
-        last_blank = False
+        parser.feed(chunk)
+        fed = True
+        # Raw size is cheap but overcounts whitespace; confirm on cleaned text.
+        if 0 < max_chars and target.size >= next_check:
+            # Strictly more than max_chars, so text that fits exactly isn't marked cut.
+            if len(_clean("".join(target.parts))) > max_chars:
+                stopped = True
+                break
+            # Mostly whitespace so far: wait for the raw text to double before
+            # cleaning again, so the re-checks stay linear overall.
+            next_check = target.size * 2
+
+    if not fed:
+        # lxml refuses to close a parser that never saw any input.
+        return "", False
+    return _clean(parser.close()), stopped
 
-    return "\n".join(compact).strip()
+
+def html_to_text(html: str) -> str:
+    chunks = (html[i : i + _CHUNK_SIZE] for i in range(0, len(html), _CHUNK_SIZE))
+    return html_chunks_to_text(chunks)[0]
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from dataclasses import asdict
+import os
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
 from typing import Any
 from urllib.parse import urlparse
 
@@ -12,24 +17,96 @@ from mcp.server.stdio import stdio_server
 from mcp.types import TextContent
 
 from .config import Settings
-from .docsets import discover_docsets, load_entry_html, search_docset, truncate_text
-from .html_text import html_to_text
+from .docsets import (
+    Docset,
+    DocsetTable,
+    SearchRouter,
+    discover_docsets,
+    ensure_fts_indexes,
+    iter_entry_html,
+    resolve_entry_path,
+    search_by_index,
+    truncate_text,
+)
+from .html_text import html_chunks_to_text
+
+try:
+    import orjson
+except ImportError:  # optional: pip install zealmcp[fast]
+    orjson = None
+
+
+def _dumps(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
+_RENDER_CACHE_SIZE = 512
 
 
 def build_server(settings: Settings) -> Server:
     server = Server("zealmcp")
 
-    docsets = {d.id: d for d in discover_docsets(settings.docsets_paths)}
+    discovered = discover_docsets(settings.docsets_paths, cache_dir=settings.cache_dir)
+    docsets = {d.id: d for d in discovered}
+
+    # Opens search connections up front so the first query doesn't pay for it.
+    table = DocsetTable.build(docsets.values())
+    router = SearchRouter(docsets.values())
+
+    def _build_fts_indexes(cache_dir: str) -> None:
+        # Until this finishes, docsets without an index are searched via their dsidx.
+        nonlocal table, router
+        indexed = ensure_fts_indexes(docsets.values(), cache_dir)
+        table, router = DocsetTable.build(indexed), SearchRouter(indexed)
+
+    # Building indexes for large docsets takes seconds; don't make startup wait.
+    if settings.cache_dir and any(d.fts_path is None for d in discovered):
+        threading.Thread(
+            target=_build_fts_indexes,
+            args=(settings.cache_dir,),
+            name="zealmcp-fts",
+            daemon=True,
+        ).start()
+
+    # LRU of rendered entries keyed by (docset id, path, mtime_ns, max_chars);
+    # mtime_ns in the key means edited files are rendered afresh.
+    rendered: OrderedDict[tuple[str, str, int, int], tuple[str, str]] = OrderedDict()
+
+    def _render(full_path: Path, max_chars: int) -> tuple[str, str]:
+        # Stop reading once enough text for max_chars has been extracted.
+        with closing(iter_entry_html(full_path)) as chunks:
+            text, cut = html_chunks_to_text(chunks, max_chars)
+        return truncate_text(text, max_chars, cut), str(full_path)
+
+    def _render_entry(d: Docset, path: str, max_chars: int) -> tuple[str, str]:
+        full_path = resolve_entry_path(d, path)
+        st = os.stat(full_path)
+        key = (d.id, path, st.st_mtime_ns, max_chars)
+        hit = rendered.get(key)
+        if hit is not None:
+            rendered.move_to_end(key)
+            return hit
+
+        result = rendered[key] = _render(full_path, max_chars)
+        if len(rendered) > _RENDER_CACHE_SIZE:
+            rendered.popitem(last=False)
+        return result
+
+    # Docsets are fixed for the server's lifetime, so the listing and its JSON are too.
+    docsets_listing = {"docsets": [
+        {
+            "id": d.id,
+            "name": d.name,
+            "root": str(d.root),
+        }
+        for d in docsets.values()
+    ]}
+    docsets_json = _dumps(docsets_listing)
 
     async def _list_docsets() -> dict[str, Any]:
-        return {"docsets": [
-            {
-                "id": d.id,
-                "name": d.name,
-                "root": str(d.root),
-            }
-            for d in docsets.values()
-        ]}
+        return docsets_listing
 
     async def _search(
         query: str, docset: str | None = None, limit: int = 10
@@ -40,39 +117,35 @@ def build_server(settings: Settings) -> Server:
             return {"results": []}
 
         if docset and docset != "all":
-            d = docsets.get(docset)
-            if not d:
+            # The table may be swapped once FTS indexes are built; use one snapshot.
+            current = table
+            i = current.id_to_index.get(docset)
+            if i is None:
                 raise ValueError(f"Unknown docset id: {docset}")
-            results = search_docset(d, q, lim)
+            # Keep the blocking sqlite query off the event loop.
+            results = await asyncio.to_thread(
+                search_by_index, current, i, q, lim, as_dicts=True
+            )
         else:
-            # Search across all docsets; keep best results per-docset in order.
-            collected = []
-            for d in docsets.values():
-                try:
-                    collected.extend(search_docset(d, q, lim))
-                except Exception:
-                    # Some docsets may not have a searchIndex table.
-                    continue
-            results = collected[:lim]
-
-        return {"results": [asdict(r) for r in results]}
+            # Ranked queries across all docsets, batches run concurrently.
+            results = await router.asearch(q, lim, as_dicts=True)
+
+        return {"results": results}
 
     async def _get_entry(docset: str, path: str, max_chars: int | None = None) -> dict[str, Any]:
         d = docsets.get(docset)
         if not d:
             raise ValueError(f"Unknown docset id: {docset}")
 
-        html, full_path = load_entry_html(d, path)
-        text = html_to_text(html)
         mc = settings.max_chars if max_chars is None else int(max_chars)
-        text = truncate_text(text, mc)
+        text, full_path = _render_entry(d, path, mc)
 
         return {"entry": {
             "docset_id": d.id,
             "docset_name": d.name,
             "path": path,
-            "source_uri": f"zeal://docset/{d.id}/doc/{path}",
-            "file": str(full_path),
+            "source_uri": d.source_uri_prefix + path,
+            "file": full_path,
             "text": text,
         }}
 
@@ -146,10 +219,9 @@ def build_server(settings: Settings) -> Server:
             raise ValueError("Invalid zeal URI")
 
         if parsed.netloc == "docsets" and parsed.path in ("", "/"):
-            items = await _list_docsets()
             return [
                 ReadResourceContents(
-                    content=json.dumps(items, ensure_ascii=False, indent=2),
+                    content=docsets_json,
                     mime_type="application/json",
                 )
             ]
@@ -169,14 +241,12 @@ def build_server(settings: Settings) -> Server:
             if not d:
                 raise FileNotFoundError(docset_id)
 
-            html, full_path = load_entry_html(d, doc_path)
-            text = html_to_text(html)
-            text = truncate_text(text, settings.max_chars)
+            text, full_path = _render_entry(d, doc_path, settings.max_chars)
             return [
                 ReadResourceContents(
                     content=text,
                     mime_type="text/plain",
-                    meta={"file": str(full_path)},
+                    meta={"file": full_path},
                 )
             ]
 
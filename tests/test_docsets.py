@@ -1,9 +1,20 @@
 from __future__ import annotations
 
+import asyncio
+import plistlib
 import sqlite3
+from dataclasses import asdict
 from pathlib import Path
 
-from zealmcp.docsets import discover_docsets, load_entry_html, search_docset
+import pytest
+
+from zealmcp.docsets import (
+    SearchRouter,
+    discover_docsets,
+    ensure_fts_indexes,
+    load_entry_html,
+    search_docset,
+)
 
 
 def _make_docset(tmp_path: Path, name: str) -> Path:
@@ -33,6 +44,52 @@ def test_discover_docsets(tmp_path: Path) -> None:
     assert docsets[0].name.lower().startswith("test")
 
 
+def test_discover_docsets_uses_manifest(tmp_path: Path) -> None:
+    docsets_dir = tmp_path / "docsets"
+    cache_dir = tmp_path / "cache"
+    root = _make_docset(docsets_dir, "Test")
+
+    first = discover_docsets([str(docsets_dir)], cache_dir=str(cache_dir))
+    assert (cache_dir / "docsets.json").exists()
+    assert discover_docsets([str(docsets_dir)], cache_dir=str(cache_dir)) == first
+
+    # A changed Info.plist is re-read even though its name is cached.
+    with (root / "Contents" / "Info.plist").open("wb") as f:
+        plistlib.dump({"CFBundleName": "Renamed"}, f)
+    docsets = discover_docsets([str(docsets_dir)], cache_dir=str(cache_dir))
+    assert [d.name for d in docsets] == ["Renamed"]
+
+
+def test_discover_docsets_rechecks_cached_base(tmp_path: Path) -> None:
+    docsets_dir = tmp_path / "docsets"
+    cache_dir = tmp_path / "cache"
+    resources = docsets_dir / "X.docset" / "Contents" / "Resources"
+    resources.mkdir(parents=True)
+    assert discover_docsets([str(docsets_dir)], cache_dir=str(cache_dir)) == []
+
+    # Filling in the docset leaves the base directory's mtime unchanged.
+    (resources / "Documents").mkdir()
+    sqlite3.connect(resources / "docSet.dsidx").close()
+    docsets = discover_docsets([str(docsets_dir)], cache_dir=str(cache_dir))
+    assert [d.id for d in docsets] == ["x"]
+
+    (resources / "docSet.dsidx").unlink()
+    assert discover_docsets([str(docsets_dir)], cache_dir=str(cache_dir)) == []
+
+
+def test_discover_docsets_reads_info_plist(tmp_path: Path) -> None:
+    xml_root = _make_docset(tmp_path, "Xml")
+    with (xml_root / "Contents" / "Info.plist").open("wb") as f:
+        info = {"Nested": {"CFBundleDisplayName": "Wrong"}, "CFBundleName": "Xml Docs"}
+        plistlib.dump(info, f)
+    bin_root = _make_docset(tmp_path, "Bin")
+    with (bin_root / "Contents" / "Info.plist").open("wb") as f:
+        plistlib.dump({"DocSetPlatformFamily": "bin"}, f, fmt=plistlib.FMT_BINARY)
+
+    docsets = discover_docsets([str(tmp_path)])
+    assert [d.name for d in docsets] == ["bin", "Xml Docs"]
+
+
 def test_search_docset(tmp_path: Path) -> None:
     _make_docset(tmp_path, "Test")
     docsets = discover_docsets([str(tmp_path)])
@@ -40,6 +97,72 @@ def test_search_docset(tmp_path: Path) -> None:
     results = search_docset(d, "Foo", limit=10)
     assert results
     assert results[0].title == "Foo"
+    assert search_docset(d, "Foo", limit=10, as_dicts=True) == [asdict(r) for r in results]
+
+
+def test_search_docset_fts(tmp_path: Path) -> None:
+    _make_docset(tmp_path / "docsets", "Test")
+    cache_dir = str(tmp_path / "cache")
+    docsets = discover_docsets([str(tmp_path / "docsets")], cache_dir=cache_dir)
+    # Discovery only picks up existing indexes; building them is separate.
+    assert docsets[0].fts_path is None
+    assert [r.title for r in search_docset(docsets[0], "foo", limit=10)] == ["Foo", "Foobar"]
+
+    d = ensure_fts_indexes(docsets, cache_dir)[0]
+    assert d.fts_path is not None and d.fts_path.exists()
+    assert discover_docsets([str(tmp_path / "docsets")], cache_dir=cache_dir) == [d]
+
+    assert [r.title for r in search_docset(d, "foo", limit=10)] == ["Foo", "Foobar"]
+    assert [r.title for r in search_docset(d, "ba", limit=10)] == ["Foobar"]
+
+
+def test_search_router_ranks_across_docsets(tmp_path: Path) -> None:
+    for i in range(12):
+        _make_docset(tmp_path, f"Test{i}")
+    docsets = discover_docsets([str(tmp_path)])
+    router = SearchRouter(docsets)
+
+    results = router.search("foo", limit=5)
+    assert len(results) == 5
+    assert all(r.title == "Foo" for r in results)
+    assert [r.title for r in router.search("bar", limit=50)] == ["Foobar"] * 12
+    assert asyncio.run(router.asearch("foo", limit=5)) == results
+
+
+def test_search_router_fts_short_queries(tmp_path: Path) -> None:
+    for i in range(3):
+        _make_docset(tmp_path / "docsets", f"Test{i}")
+    cache_dir = str(tmp_path / "cache")
+    docsets = ensure_fts_indexes(discover_docsets([str(tmp_path / "docsets")]), cache_dir)
+    assert all(d.fts_path is not None for d in docsets)
+    router = SearchRouter(docsets)
+
+    # 3+ chars go to the FTS indexes, shorter queries to each docset's searchIndex.
+    assert [r.title for r in router.search("bar", limit=10)] == ["Foobar"] * 3
+    assert [r.title for r in router.search("ba", limit=10)] == ["Foobar"] * 3
+    assert asyncio.run(router.asearch("ba", limit=10)) == router.search("ba", limit=10)
+
+
+def test_search_docset_fts_prefers_prefix_matches(tmp_path: Path) -> None:
+    root = _make_docset(tmp_path / "docsets", "Test")
+    conn = sqlite3.connect(root / "Contents" / "Resources" / "docSet.dsidx")
+    conn.executemany(
+        "INSERT INTO searchIndex VALUES (?, 'Guide', 'x.html')",
+        [("Mapper",), ("xMap",), ("MapLike",), ("aMa",), ("Map",)],
+    )
+    conn.commit()
+    conn.close()
+    cache_dir = str(tmp_path / "cache")
+    d = ensure_fts_indexes(discover_docsets([str(tmp_path / "docsets")]), cache_dir)[0]
+    assert d.fts_path is not None
+
+    # Substring hits are shorter than the prefix hits but must rank after them.
+    assert [r.title for r in search_docset(d, "Map", limit=4)] == [
+        "Map", "Mapper", "MapLike", "xMap"
+    ]
+    assert [r.title for r in search_docset(d, "ma", limit=4)] == [
+        "Map", "Mapper", "MapLike", "aMa"
+    ]
 
 
 def test_load_entry_html_strips_anchor(tmp_path: Path) -> None:
@@ -49,3 +172,18 @@ def test_load_entry_html_strips_anchor(tmp_path: Path) -> None:
     html, path = load_entry_html(d, "foo.html#section")
     assert "<h1>Foo</h1>" in html
     assert path.name == "foo.html"
+
+
+def test_load_entry_html_byte_limit(tmp_path: Path) -> None:
+    _make_docset(tmp_path, "Test")
+    d = discover_docsets([str(tmp_path)])[0]
+    html, _ = load_entry_html(d, "foo.html", byte_limit=10)
+    assert html == "<html><bod"
+
+
+def test_load_entry_html_rejects_escape(tmp_path: Path) -> None:
+    root = _make_docset(tmp_path, "Test")
+    (root / "Contents" / "secret.html").write_text("secret")
+    d = discover_docsets([str(tmp_path)])[0]
+    with pytest.raises(RuntimeError):
+        load_entry_html(d, "../../secret.html")
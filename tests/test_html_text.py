@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from zealmcp.html_text import html_to_text
+from zealmcp.html_text import html_chunks_to_text, html_to_text
 
 
 def test_html_to_text_strips_scripts() -> None:
@@ -9,3 +9,28 @@ def test_html_to_text_strips_scripts() -> None:
     assert "alert" not in text
     assert "Title" in text
     assert "Hi" in text
+
+
+def test_html_to_text_separates_blocks() -> None:
+    html = "<h1>Title</h1><p>Hello <b>world</b></p><style>p {}</style><p>Bye</p>"
+    assert html_to_text(html) == "Title\n\nHello world\n\nBye"
+
+
+def test_html_chunks_to_text_stops_at_max_chars() -> None:
+    chunks = iter(["<p>" + "a" * 50 + "</p>", "<p>" + "b" * 50 + "</p>", "<p>c</p>"])
+    text, stopped = html_chunks_to_text(chunks, max_chars=60)
+    assert stopped
+    assert text == "a" * 50 + "\n\n" + "b" * 50
+    assert next(chunks) == "<p>c</p>"
+
+
+def test_html_chunks_to_text_whitespace_heavy() -> None:
+    chunk = "<pre>" + " " * 65_000 + "x</pre>"
+    text, stopped = html_chunks_to_text(iter([chunk] * 200), max_chars=1_000)
+    assert not stopped
+    assert text.replace("\n", "") == "x" * 200
+
+
+def test_html_chunks_to_text_exact_fit_not_stopped() -> None:
+    text, stopped = html_chunks_to_text(iter(["<p>" + "a" * 10 + "</p>"]), max_chars=10)
+    assert (text, stopped) == ("a" * 10, False)
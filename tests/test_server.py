@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+from mcp import types as mtypes
+from mcp.server import Server
+
+from zealmcp.config import Settings
+from zealmcp.server import build_server
+
+
+def _make_server(tmp_path: Path, html: str) -> tuple[Server, Path]:
+    resources = tmp_path / "docsets" / "Test.docset" / "Contents" / "Resources"
+    docs = resources / "Documents"
+    docs.mkdir(parents=True)
+    conn = sqlite3.connect(resources / "docSet.dsidx")
+    conn.execute("CREATE TABLE searchIndex (name TEXT, type TEXT, path TEXT)")
+    conn.execute("INSERT INTO searchIndex VALUES ('Page', 'Guide', 'page.html')")
+    conn.commit()
+    conn.close()
+    page = docs / "page.html"
+    page.write_text(html)
+
+    settings = Settings(
+        docsets_paths=(str(tmp_path / "docsets"),), cache_dir=str(tmp_path / "cache")
+    )
+    return build_server(settings), page
+
+
+def _call_tool(server: Server, name: str, arguments: dict[str, Any]) -> dict[str, Any]:
+    handler = server.request_handlers[mtypes.CallToolRequest]
+    request = mtypes.CallToolRequest(
+        method="tools/call",
+        params=mtypes.CallToolRequestParams(name=name, arguments=arguments),
+    )
+    result = asyncio.run(handler(request)).root
+    assert not result.isError, result.content
+    return result.structuredContent
+
+
+def _entry_text(server: Server) -> str:
+    return _call_tool(server, "get_entry", {"docset": "test", "path": "page.html"})["entry"]["text"]
+
+
+def test_get_entry_cache_follows_mtime(tmp_path: Path) -> None:
+    server, page = _make_server(tmp_path, "<p>Old</p>")
+    assert _entry_text(server) == "Old"
+    st = os.stat(page)
+
+    # Same mtime: the cached text is served.
+    page.write_text("<p>New</p>")
+    os.utime(page, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert _entry_text(server) == "Old"
+
+    # A new mtime invalidates the cached text.
+    os.utime(page, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert _entry_text(server) == "New"
+
+
+def test_get_entry_reads_past_large_head(tmp_path: Path) -> None:
+    script = "<script>" + "x" * 200_000 + "</script>"
+    body = "<p>" + "word " * 100 + "</p>"
+    server, _ = _make_server(tmp_path, f"<html><head>{script}</head><body>{body}</body></html>")
+    args = {"docset": "test", "path": "page.html", "max_chars": 100}
+    text = _call_tool(server, "get_entry", args)["entry"]["text"]
+    assert text.startswith("word word")
+    assert text.endswith("[TRUNCATED]")
+
+
+def test_search_while_fts_index_builds_in_background(tmp_path: Path) -> None:
+    server, _ = _make_server(tmp_path, "<p>Page</p>")
+    # Served from the dsidx whether or not the index is ready yet.
+    results = _call_tool(server, "search", {"query": "Page"})["results"]
+    assert [r["title"] for r in results] == ["Page"]
+
+    for t in threading.enumerate():
+        if t.name == "zealmcp-fts":
+            t.join()
+    assert (tmp_path / "cache" / "test.fts.sqlite").exists()
+    results = _call_tool(server, "search", {"query": "Page", "docset": "test"})["results"]
+    assert [r["title"] for r in results] == ["Page"]